@@ -1,19 +1,25 @@
 '''Application module'''
 
-import copy
 import curses
 import curses.ascii
+import io
 import os
+import queue
 import sys
+import threading
 
 from curses.textpad import Textbox
 from typing import Any
+from typing import Callable
+from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 from . import debug
 from . import enums
 from . import keys
+from . import models
 from . import types
 from . import views
 
@@ -22,12 +28,96 @@ USE_DEBUG = False
 
 STATUS_UNCHANGED = 'unchanged'
 
+# File version used when no file has been loaded yet
+NO_VERSION: Tuple[int, ...] = ()
+
+# Bounds of the delay (in ms) to wait for a key before polling the
+# application. The delay doubles each time polling finds nothing new,
+# and is reset to its minimum on any key press or file change.
+POLL_DELAY_MIN = 50
+POLL_DELAY_MAX = 2000
+# Poll delay meaning that polling is not needed
+POLL_NEVER = -1
+
+# How long (in ms) to wait for more resize events before actually resizing
+RESIZE_COALESCE_DELAY = 16
+
+# Size of the buffer used when reading files
+READ_BUFFER_SIZE = 1 << 20
+
+# Number of bytes at the end of the loaded content that must be unchanged
+# for a file that grew to be considered as only appended to
+TAIL_CHECK_SIZE = 4096
+
+
+def read_lines(f) -> List[str]:
+    '''Reads all the lines of the given binary file object, from its
+    current position up to its end.'''
+    text = io.TextIOWrapper(f, encoding='utf-8')
+    # Iterate over lines rather than calling read().splitlines() to
+    # never hold the whole file content in one single string on top
+    # of the list of lines. Universal newlines mode translates any
+    # line ending into '\n', which we remove.
+    lines = [line.rstrip('\n') for line in text]
+    # Detach so that f does not get closed along with text
+    text.detach()
+    return lines
+
 
 def load_lines(path: str) -> List[str]:
     '''Load all the lines of the given file.'''
-    with open(path, encoding='utf-8') as f:
-        # splitlines() ensures that any newline char is removed
-        return f.read().splitlines()
+    with open(path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        return read_lines(f)
+
+
+def read_tail(f, size: int) -> bytes:
+    '''Reads the last bytes of the given binary file object before the
+    given offset, leaving the file positioned at that offset.'''
+    start = max(0, size - TAIL_CHECK_SIZE)
+    f.seek(start)
+    return f.read(size - start)
+
+
+def reload_lines(
+        path: str,
+        lines: List[str],
+        size: int,
+        tail: bytes,
+        new_size: int,
+) -> Tuple[List[str], int, bytes]:
+    '''Loads the lines of the given file and returns them along with the
+    number of bytes read and the tail of these bytes. If the file grew from
+    size (the number of bytes the given lines were read from, ending with
+    the given tail) to new_size, and still has the same tail at the same
+    offset, assumes the file is only being appended to (like a log) and
+    only reads the new lines. Callers must pass no lines if the file got
+    replaced by another one.'''
+    with open(path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        new_lines = None
+        # Only possible if last load ended with a complete line, and if
+        # what was last read did not get rewritten
+        if 0 < size < new_size and tail.endswith(b'\n') and \
+           read_tail(f, size) == tail:
+            new_lines = lines + read_lines(f)
+        if new_lines is None:
+            f.seek(0)
+            new_lines = read_lines(f)
+        # The file might have grown since stat, so rely on what was
+        # actually read
+        read_size = f.tell()
+        return new_lines, read_size, read_tail(f, read_size)
+
+
+def drain_resize_events(scr) -> None:
+    '''Swallows the resize events pending or happening shortly, as resizing
+    a window generates a storm of them, while only the last one matters.
+    Assumes the caller sets the timeout again before waiting for keys.'''
+    scr.timeout(RESIZE_COALESCE_DELAY)
+    key = scr.getch()
+    while key == curses.KEY_RESIZE:
+        key = scr.getch()
+    if key >= 0:
+        curses.ungetch(key)
 
 
 def get_max_yx(scr) -> types.Size:
@@ -37,9 +127,23 @@ def get_max_yx(scr) -> types.Size:
     return scr.getmaxyx()
 
 
-def getmtime(path):
-    '''Wraps os.getmtime() for testing.'''
-    return os.path.getmtime(path)
+def stat(path):
+    '''Wraps os.stat() for testing.'''
+    return os.stat(path)
+
+
+def file_version(st) -> Tuple[int, ...]:
+    '''Returns what tells apart versions of a file from its status. The
+    size is part of it, as modification times can be coarse or preserved
+    by tools copying files. The device and inode numbers come first, and
+    identify the file itself.'''
+    return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def is_same_file(version: Tuple[int, ...], st) -> bool:
+    '''Returns whether the given status is of the file the given version
+    was taken from, as opposed to a file that replaced it.'''
+    return version[:2] == (st.st_dev, st.st_ino)
 
 
 class EscapeException(Exception):
@@ -55,17 +159,28 @@ def validate(k: int) -> int:
     return k
 
 
-def get_text(*, scr, y: int, x: int, text_prompt: str, handler, text: str) -> str:
-    '''Gets text interactively from end user.'''
-    _, maxw = get_max_yx(scr)
+def get_text(*, scr, y: int, x: int, text_prompt: str, handler, text: str,
+             maxw: Optional[int] = None) -> str:
+    '''Gets text interactively from end user. The caller can pass the
+    width of the screen if it already knows it.'''
+    if maxw is None:
+        _, maxw = get_max_yx(scr)
     scr.addstr(y, x, text_prompt)
     x += len(text_prompt)
     width = max(0, maxw - x)
     editwin = curses.newwin(1, width, y, x)
-    scr.refresh()
     box = Textbox(editwin)
-    for c in text:
-        box.do_command(ord(c))
+    # Prefill the window directly rather than feeding each character
+    # through the Textbox, keeping the last column free like it does
+    text = text[:max(0, width - 1)]
+    if text:
+        editwin.addstr(0, 0, text)
+        editwin.move(0, len(text))
+    # Stage prompt and prefilled text, and write them to the terminal in
+    # one single update
+    scr.noutrefresh()
+    editwin.noutrefresh()
+    curses.doupdate()
     text = ''
     try:
         handler(box)
@@ -73,25 +188,30 @@ def get_text(*, scr, y: int, x: int, text_prompt: str, handler, text: str) -> st
     except EscapeException:
         pass
 
-    editwin.clear()
-    editwin.refresh()
-    clear(scr, y, 0, len(text_prompt))
+    # erase() rather than clear(), which would repaint the whole terminal
+    editwin.erase()
+    editwin.noutrefresh()
+    clear(scr, y, 0, len(text_prompt), maxw)
     return text if text else ''
 
 
-def prompt(scr, y: int, x: int, text_prompt: str, text: str) -> str:
+def prompt(scr, y: int, x: int, text_prompt: str, text: str,
+           *, maxw: Optional[int] = None) -> str:
     '''Prompts user to enter some text.'''
     def handle(box):
         box.edit(validate=validate)
     return get_text(scr=scr, y=y, x=x,
-                    text_prompt=text_prompt, handler=handle, text=text)
+                    text_prompt=text_prompt, handler=handle, text=text,
+                    maxw=maxw)
 
 
-def clear(scr, y: int, x: int, length: int):
-    '''Prints "length" spaces at the given position.'''
-    _, maxw = get_max_yx(scr)
-    blank = f'{" ":>{length}}'
-    scr.addstr(y, x, blank[:maxw-(x+1)])
+def clear(scr, y: int, x: int, length: int, maxw: Optional[int] = None):
+    '''Prints "length" spaces at the given position. The caller can pass
+    the width of the screen if it already knows it.'''
+    if maxw is None:
+        _, maxw = get_max_yx(scr)
+    # hline() repeats the character without building any string
+    scr.hline(y, x, ' ', max(0, min(length, maxw-(x+1))))
     scr.move(y, x)
 
 
@@ -101,6 +221,34 @@ class App:
 
     # pylint: disable=too-many-instance-attributes
 
+    # App is long lived and its attributes are accessed on every key press
+    __slots__ = (
+        '_help_lines',
+        '_debug_view',
+        '_event_view',
+        '_scr',
+        '_margins',
+        '_show_events',
+        '_path',
+        '_views',
+        '_help_view_index',
+        '_current',
+        '_hidden_view',
+        '_y_get_text',
+        '_max_yx',
+        '_lines',
+        '_version',
+        '_size',
+        '_tail',
+        '_auto_reload',
+        '_auto_reload_anchor',
+        '_poll_delay',
+        '_loader',
+        '_loaded',
+        '_generation',
+        '_cmd_to_func',
+    )
+
     def __init__(self, help_lines: List[str]) -> None:
         self._help_lines: List[str] = help_lines
         self._debug_view: views.DebugView
@@ -114,15 +262,75 @@ class App:
         self._current: int = -1
         self._hidden_view: int = -1
         self._y_get_text: int = 0
-        self._mtime: float = 0.0
+        # Screen size as of last layout, which is redone on resize
+        self._max_yx: types.Size = (0, 0)
+        self._lines: List[str] = []
+        self._version: Tuple[int, ...] = NO_VERSION
+        self._size: int = 0
+        self._tail: bytes = b''
         self._auto_reload: bool = False
         self._auto_reload_anchor: int = 0
+        self._poll_delay: int = POLL_DELAY_MIN
+        # Auto reload loads the file in a background thread, which posts
+        # the loaded lines in a queue. The generation is incremented each
+        # time lines are set, so that a load started from lines that have
+        # been replaced since then is discarded.
+        self._loader: Optional[threading.Thread] = None
+        self._loaded: queue.Queue = queue.Queue()
+        self._generation: int = 0
+
+        # Map the commands requiring custom functions and that
+        # cannot be directly sent over the current view. Built once
+        # here rather than on every key press, and stored in a list
+        # indexed by command value.
+        cmd_to_func: Dict[
+            enums.Command, Callable[[], types.Status]] = {
+            enums.Command.SHOW_VIEW_1:
+                lambda: self._set_view(0, False),
+            enums.Command.SHOW_VIEW_2:
+                lambda: self._set_view(1, False),
+            enums.Command.SHOW_VIEW_3:
+                lambda: self._set_view(2, False),
+            enums.Command.SHOW_VIEW_1_WITH_FILTER:
+                lambda: self._set_view(0, True),
+            enums.Command.SHOW_VIEW_2_WITH_FILTER:
+                lambda: self._set_view(1, True),
+            enums.Command.SHOW_VIEW_3_WITH_FILTER:
+                lambda: self._set_view(2, True),
+            enums.Command.SHOW_HELP:
+                self._help_view_push,
+            enums.Command.EDIT_KEYWORD:
+                self._edit_keyword,
+            enums.Command.PUSH_KEYWORD:
+                lambda: self._new_keyword(False),
+            enums.Command.PUSH_FILTER_AND_KEYWORD:
+                lambda: self._new_keyword(True),
+            enums.Command.RELOAD_HEAD:
+                lambda: self._reload(0),
+            enums.Command.RELOAD_HEAD_AUTO:
+                lambda: self._toggle_auto_reload(0),
+            enums.Command.RELOAD_TAIL:
+                lambda: self._reload(sys.maxsize),
+            enums.Command.RELOAD_TAIL_AUTO:
+                lambda: self._toggle_auto_reload(sys.maxsize),
+            enums.Command.TRY_SEARCH:
+                self.try_start_search,
+            enums.Command.GOTO_LINE:
+                self._goto_line,
+            enums.Command.RESIZE:
+                self._resize,
+        }
+        self._cmd_to_func: List[Optional[Callable[[], types.Status]]] = \
+            [None] * (max(c.value for c in enums.Command) + 1)
+        for cmd, func in cmd_to_func.items():
+            self._cmd_to_func[cmd.value] = func
 
     def layout(self) -> types.Size:
         '''Recompute layout'''
         assert self._scr
         scr = self._scr
-        maxh, maxw = get_max_yx(scr)
+        self._max_yx = get_max_yx(scr)
+        maxh, maxw = self._max_yx
         maxh -= (self._margins.top + self._margins.bottom)
         maxw -= (self._margins.left + self._margins.right)
         x = self._margins.left
@@ -162,7 +370,7 @@ class App:
         config = self._views[self._current].get_config()
         self._current = idx
         if propagate_config:
-            self._views[idx].set_config(copy.deepcopy(config))
+            self._views[idx].set_config(config.clone())
         self._views[idx].show()
         return f'Switched to {self._views[idx].name()}'
 
@@ -173,16 +381,87 @@ class App:
         assert self._hidden_view >= 0
         return self._set_view(self._hidden_view, False)
 
-    def _reload(self, scroll_to: int) -> types.Status:
-        lines = load_lines(self._path)
+    def _set_lines(self, lines: List[str], size: int, tail: bytes) -> None:
+        '''Sets the lines read from the file, the number of bytes they
+        were read from, and the last of these bytes.'''
+        self._lines = lines
+        self._size = size
+        self._tail = tail
+        self._generation += 1
+        # All views share the same buffer, so that lines are only
+        # prepared once per SGR mode. Help view content never changes and
+        # is set once and for all on creation.
+        buffer = models.LinesBuffer(self._lines)
         for i, v in enumerate(self._views):
-            if i == self._help_view_index:
-                v.set_lines(self._help_lines)
-            else:
-                v.set_lines(lines)
+            if i != self._help_view_index:
+                v.set_buffer(buffer)
+
+    def _scroll(self, scroll_to: int) -> None:
+        '''Scrolls text views to the given offset, and draws the current
+        view.'''
+        for i, v in enumerate(self._views):
+            if i != self._help_view_index:
                 v.set_v_offset(scroll_to, False)
         self._views[self._current].draw()
-        self._mtime = getmtime(self._path)
+
+    def _reload(self, scroll_to: int) -> types.Status:
+        '''Reloads the whole file content, and scrolls text views to the
+        given offset. Reloading is never skipped, so that users can
+        always force it, even when polling does not see a change.'''
+        st = stat(self._path)
+        # Remember the version we observed *before* reading the file, so
+        # that any change happening while we read gets picked up by the
+        # next poll.
+        self._version = file_version(st)
+        self._set_lines(*reload_lines(self._path, [], 0, b'', st.st_size))
+        self._scroll(scroll_to)
+        return 'File reloaded'
+
+    def _start_loading(self, st) -> None:
+        '''Starts loading the file in a background thread, reading only the
+        appended lines if possible.'''
+        path = self._path
+        lines = self._lines
+        size = self._size
+        tail = self._tail
+        if not is_same_file(self._version, st):
+            # Editors and tools like logrotate replace files rather
+            # than modifying them
+            lines, size, tail = [], 0, b''
+        generation = self._generation
+        # Each load posts to its own queue, so that no stale result can
+        # ever be picked up by a later load
+        loaded: queue.Queue = queue.Queue(maxsize=1)
+
+        def load():
+            # Always post something, even on failure, so that the main
+            # thread does not try loading the same file version again
+            # pylint: disable=broad-except
+            try:
+                result = reload_lines(path, lines, size, tail, st.st_size)
+            except Exception as ex:
+                loaded.put((generation, file_version(st), None, ex))
+            else:
+                loaded.put((generation, file_version(st), result, None))
+
+        self._loaded = loaded
+        self._loader = threading.Thread(target=load, daemon=True)
+        self._loader.start()
+
+    def _finish_loading(self) -> types.Status:
+        '''Sets the lines loaded by the background thread, which is assumed
+        to be done.'''
+        self._loader = None
+        generation, version, result, error = self._loaded.get_nowait()
+        if generation != self._generation:
+            # Lines got reloaded since loading started
+            return STATUS_UNCHANGED
+        # Failed loads are not retried until the file changes again
+        self._version = version
+        if result is None:
+            return f'Reload failed: {error}'
+        self._set_lines(*result)
+        self._scroll(self._auto_reload_anchor)
         return 'File reloaded'
 
     def create(
@@ -200,6 +479,10 @@ class App:
         self._margins = margins
         self._show_events = show_events
         self._path = path
+        self._version = NO_VERSION
+        self._size = 0
+        self._tail = b''
+        self._loader = None
         self._views.clear()
         self._views.append(views.TextView(store, scr, 'View 1', path))
         self._views.append(views.TextView(store, scr, 'View 2', path))
@@ -212,6 +495,8 @@ class App:
             debug.OUT_FUNC = self._debug_view.out
         self._event_view = views.KeyEventView(scr)
         self.layout()
+        self._views[self._help_view_index].set_buffer(
+            models.LinesBuffer(self._help_lines))
         self._reload(0)
         self._set_view(0, False)
 
@@ -221,7 +506,8 @@ class App:
                       self._y_get_text,
                       self._margins.left,
                       text_prompt,
-                      text)
+                      text,
+                      maxw=self._max_yx[1])
 
     def _get_keyword(self) -> str:
         return self.prompt('Keyword: ', '')
@@ -239,104 +525,104 @@ class App:
         self._auto_reload_anchor = anchor
         return f'Auto reload {self._auto_reload}'
 
+    @property
+    def lines(self) -> List[str]:
+        '''Lines loaded from the file.'''
+        return self._lines
+
+    @property
+    def current_view(self) -> views.TextView:
+        '''View currently displayed.'''
+        return self._views[self._current]
+
+    def handles(self, command: enums.Command) -> bool:
+        '''Tells whether the given command is handled by the application
+        itself, rather than by the current view.'''
+        return command is enums.Command.QUIT or \
+            self._cmd_to_func[command.value] is not None
+
+    def get_poll_delay(self) -> int:
+        '''Returns how long (in ms) to wait for a key before polling the
+        application again, or a negative value if there is no need to poll
+        and waiting for a key can block.'''
+        if not self._auto_reload and not self._loader:
+            return POLL_NEVER
+        return self._poll_delay
+
     def _poll(self) -> Tuple[bool, types.Status]:
+        if self._loader:
+            self._poll_delay = POLL_DELAY_MIN
+            if self._loader.is_alive():
+                return False, STATUS_UNCHANGED
+            status = self._finish_loading()
+            if status != STATUS_UNCHANGED:
+                return True, status
         if self._auto_reload:
-            mtime = getmtime(self._path)
-            if mtime != self._mtime:
-                return True, self._reload(self._auto_reload_anchor)
+            st = stat(self._path)
+            if file_version(st) != self._version:
+                # Do not block the UI while loading, next polls will pick
+                # up the loaded lines.
+                self._poll_delay = POLL_DELAY_MIN
+                self._start_loading(st)
+                return False, STATUS_UNCHANGED
+        # Nothing changed, so back off to stat the file less often
+        self._poll_delay = min(2 * self._poll_delay, POLL_DELAY_MAX)
         return False, STATUS_UNCHANGED
 
+    def _new_keyword(self, new_filter: bool) -> types.Status:
+        keyword = self._get_keyword()
+        return self._views[self._current].push_keyword(keyword, new_filter)
+
+    def _goto_line(self) -> types.Status:
+        line_as_text = self.prompt('Enter line: ', '')
+        return self._views[self._current].goto_line(line_as_text)
+
+    def _edit_keyword(self) -> types.Status:
+        v = self._views[self._current]
+        count, keyword = v.get_last_keyword()
+        if count <= 0:
+            return 'No keyword to edit'
+        keyword = self.prompt('Edit: ', keyword if keyword else '')
+        if len(keyword) <= 0:
+            return 'No change made'
+        v.execute(enums.Command.POP_KEYWORD)
+        v.push_keyword(keyword, count == 1)
+        return 'Keyword updated'
+
+    def _resize(self) -> types.Status:
+        drain_resize_events(self._scr)
+        self._scr.clear()
+        self._scr.noutrefresh()
+        size = self.layout()
+        self._views[self._current].draw()
+        return f'Resized to {size[1]}x{size[0]}'
+
     def handle_event(
             self,
             ev: keys.KeyEvent,
     ) -> Tuple[bool, types.Status]:
         '''Handles the given key, propagating it to the proper view.'''
 
-        if self._show_events:
-            self._event_view.show(ev)
-
         if ev.is_poll():
             return self._poll()
 
-        # Local functions redirecting to current view v
-        v = self._views[self._current]
-
-        def new_keyword(new_filter) -> types.Status:
-            keyword = self._get_keyword()
-            return v.push_keyword(keyword, new_filter)
-
-        def goto_line() -> types.Status:
-            line_as_text = self.prompt('Enter line: ', '')
-            return v.goto_line(line_as_text)
-
-        def edit_keyword() -> types.Status:
-            count, keyword = v.get_last_keyword()
-            if count <= 0:
-                return 'No keyword to edit'
-            keyword = self.prompt('Edit: ', keyword if keyword else '')
-            if len(keyword) <= 0:
-                return 'No change made'
-            v.execute(enums.Command.POP_KEYWORD)
-            v.push_keyword(keyword, count == 1)
-            return 'Keyword updated'
-
-        def resize() -> types.Status:
-            self._scr.clear()
-            self._scr.refresh()
-            size = self.layout()
-            v.draw()
-            return f'Resized to {size[1]}x{size[0]}'
+        self._poll_delay = POLL_DELAY_MIN
 
-        # Map the commands requiring custom functions and that
-        # cannot be directly sent over the current view.
-        cmd_to_func = {
-            enums.Command.SHOW_VIEW_1:
-                lambda: self._set_view(0, False),
-            enums.Command.SHOW_VIEW_2:
-                lambda: self._set_view(1, False),
-            enums.Command.SHOW_VIEW_3:
-                lambda: self._set_view(2, False),
-            enums.Command.SHOW_VIEW_1_WITH_FILTER:
-                lambda: self._set_view(0, True),
-            enums.Command.SHOW_VIEW_2_WITH_FILTER:
-                lambda: self._set_view(1, True),
-            enums.Command.SHOW_VIEW_3_WITH_FILTER:
-                lambda: self._set_view(2, True),
-            enums.Command.SHOW_HELP:
-                self._help_view_push,
-            enums.Command.EDIT_KEYWORD:
-                edit_keyword,
-            enums.Command.PUSH_KEYWORD:
-                lambda: new_keyword(False),
-            enums.Command.PUSH_FILTER_AND_KEYWORD:
-                lambda: new_keyword(True),
-            enums.Command.RELOAD_HEAD:
-                lambda: self._reload(0),
-            enums.Command.RELOAD_HEAD_AUTO:
-                lambda: self._toggle_auto_reload(0),
-            enums.Command.RELOAD_TAIL:
-                lambda: self._reload(sys.maxsize),
-            enums.Command.RELOAD_TAIL_AUTO:
-                lambda: self._toggle_auto_reload(sys.maxsize),
-            enums.Command.TRY_SEARCH:
-                self.try_start_search,
-            enums.Command.GOTO_LINE:
-                goto_line,
-            enums.Command.RESIZE:
-                resize,
-        }
+        if self._show_events:
+            self._event_view.show(ev)
 
         handled: bool = True  # Assumed until otherwise
         status: types.Status = ''
-        if ev.cmd == enums.Command.QUIT or ev.key == curses.ascii.ESC:
+        func = self._cmd_to_func[ev.cmd.value] if ev.cmd else None
+        if ev.cmd is enums.Command.QUIT or ev.key == curses.ascii.ESC:
             if self._hidden_view < 0:
                 handled = False
             else:
                 status = self._help_view_pop()
-        elif ev.cmd in cmd_to_func:
-            status = cmd_to_func[ev.cmd]()
+        elif func:
+            status = func()
         elif ev.cmd:
-            status = v.execute(ev.cmd)
+            status = self._views[self._current].execute(ev.cmd)
         else:
             handled = False
             status = f'Unknown key {ev.text} (? for help, q to quit)'
@@ -2,6 +2,10 @@
 
 import curses
 
+from typing import List
+from typing import Set
+from typing import Tuple
+
 from . import types
 
 Pair = int
@@ -84,6 +88,17 @@ PALETTES = [
     ],
 ]
 
+# (pair id, foreground, background) of the color pairs set by each palette,
+# to render text in color, or in reverse with a colored background
+PALETTE_PAIRS_NORMAL: List[List[Tuple[PairId, ColorId, ColorId]]] = [
+    [(FIRST_FILTER_COLOR_PAIR_ID + i, color, -1)
+     for i, color in enumerate(pal)]
+    for pal in PALETTES]
+PALETTE_PAIRS_REVERSE: List[List[Tuple[PairId, ColorId, ColorId]]] = [
+    [(FIRST_FILTER_COLOR_PAIR_ID + i, 0, color)
+     for i, color in enumerate(pal)]
+    for pal in PALETTES]
+
 
 def cycle_palette(
         palette_id: types.PaletteId,
@@ -101,14 +116,17 @@ def apply_palette(
         reverse: bool,
 ) -> None:
     '''Applies given palette to curses.'''
+    plans = PALETTE_PAIRS_REVERSE if reverse else PALETTE_PAIRS_NORMAL
     # Note: python raises IndexError for us if palette_index is out of range
-    pal = PALETTES[palette_id]
-    for i, color in enumerate(pal):
-        pair_id = FIRST_FILTER_COLOR_PAIR_ID + i
-        if reverse:
-            curses.init_pair(pair_id, 0, color)
-        else:
-            curses.init_pair(pair_id, color, -1)
+    for pair_id, fg, bg in plans[palette_id]:
+        curses.init_pair(pair_id, fg, bg)
+
+
+# Color pairs of each palette, indexed by filter index modulo the number
+# of colors in the palette. Built once colors are initialized.
+PALETTE_COLOR_PAIRS: List[List[Pair]] = []
+# Same as curses.color_pair(0), which is always 0
+DEFAULT_COLOR_PAIR: Pair = 0
 
 
 def get_color_pair(
@@ -117,10 +135,9 @@ def get_color_pair(
 ) -> Pair:
     '''Gets the curses.color_pair associated with given palette and filter.'''
     if filter_index < 0:
-        return curses.color_pair(0)
-    colors_count = len(PALETTES[palette_id])
-    pair_id = FIRST_FILTER_COLOR_PAIR_ID + (filter_index % colors_count)
-    return curses.color_pair(pair_id)
+        return DEFAULT_COLOR_PAIR
+    pairs = PALETTE_COLOR_PAIRS[palette_id]
+    return pairs[filter_index % len(pairs)]
 
 
 def get_color_pair_id(
@@ -140,28 +157,44 @@ def get_color_pair_id(
     return 48 + bg
 
 
+# SGR color pairs are only initialized the first time they are used, as
+# most files use few of them (if any)
+SGR_PAIRS_INITIALIZED: Set[PairId] = set()
+
+
 def get_fg_bg_color_pair(
         fg: ColorId,
         bg: ColorId
 ) -> Pair:
     '''Returns the color pair use to display the given fg and bg colors.'''
-    return curses.color_pair(get_color_pair_id(fg, bg))
+    pair_id = get_color_pair_id(fg, bg)
+    if pair_id not in SGR_PAIRS_INITIALIZED:
+        if bg == -1 or fg == -1 or fg == bg:
+            curses.init_pair(pair_id, fg, bg)
+        else:
+            curses.init_pair(pair_id, 15, bg)
+        SGR_PAIRS_INITIALIZED.add(pair_id)
+    return curses.color_pair(pair_id)
 
 
 def init_color_pairs():
     '''Initiliazes the color pairs we depend on.'''
     curses.init_pair(BAR_COLOR_PAIR_ID, 0, BAR_COLOR_BG)
-    for i in range(16):
-        curses.init_pair(i, i, -1)
-        curses.init_pair(i + 16, -1, i)
-        curses.init_pair(i + 32, i, i)
-        curses.init_pair(i + 48, 15, i)
+    SGR_PAIRS_INITIALIZED.clear()
+    PALETTE_COLOR_PAIRS[:] = [
+        [curses.color_pair(FIRST_FILTER_COLOR_PAIR_ID + i)
+         for i in range(len(pal))]
+        for pal in PALETTES]
 
 
 def init():
     '''Initializes color support.'''
-    assert curses.has_colors()
-    assert curses.COLORS >= 256, 'Not enough colors (try TERM=screen-256color)'
+    # Not asserts, as these depend on the terminal and must also be
+    # checked when running optimized
+    if not curses.has_colors():
+        raise RuntimeError('Terminal does not support colors')
+    if curses.COLORS < 256:
+        raise RuntimeError('Not enough colors (try TERM=screen-256color)')
     curses.start_color()
     curses.use_default_colors()
     init_color_pairs()
@@ -20,10 +20,10 @@ class AutoEnum(Enum):
     @classmethod
     def from_int(cls, i):
         '''Returns the enum member associated with the given integer.'''
-        for member in cls:
-            if member.value == i:
-                return member
-        raise ValueError('Unsupported enum value')
+        try:
+            return cls._value2member_map_[i]
+        except KeyError:
+            raise ValueError('Unsupported enum value') from None
 
     @classmethod
     def get(cls, i):
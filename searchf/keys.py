@@ -18,6 +18,11 @@ UNMAP = -2
 # Number of seconds to wait before canceling key escape sequence
 ESCAPE_TIMEOUT = 0.1
 
+# Number of milliseconds to wait for the next key of an escape sequence.
+# curses already waits ESCDELAY after reading ESC, so the rest of a
+# sequence sent by the terminal is normally buffered by then
+ESCAPE_POLL_DELAY = 10
+
 
 # Map keys to simple text view commands
 KEYS_TO_COMMAND = {
@@ -129,9 +134,8 @@ KEYS_TO_TEXT = {
 
 
 def _key_to_text(key: int) -> str:
-    if key in KEYS_TO_TEXT:
-        return KEYS_TO_TEXT[key]
-    return f'{chr(key)}'
+    text = KEYS_TO_TEXT.get(key)
+    return text if text is not None else chr(key)
 
 
 class KeyEvent():
@@ -150,13 +154,17 @@ class KeyEvent():
                  cmd: Optional[enums.Command] = None):
         self.key = key
         self.text = text
-        self.cmd = cmd
-        if not cmd and key in KEYS_TO_COMMAND:
-            self.cmd = KEYS_TO_COMMAND[key]
+        # Single lookup rather than testing membership first
+        self.cmd = cmd if cmd else KEYS_TO_COMMAND.get(key)
         if not text or len(text) <= 0:
             self.text = _key_to_text(key)
 
 
+# Shared poll event, returned on every timeout tick rather than allocating
+# a new event each time. Must not be modified.
+POLL_EVENT = KeyEvent(POLL)
+
+
 class Provider:
     '''Key press provider, that replaces curses getch()
     implementation when testing.'''
@@ -226,6 +234,10 @@ class Processor:
         self._seq = ''
         self.start_: datetime.datetime = datetime.datetime.min
 
+    def is_escaping(self) -> bool:
+        '''Returns whether or not an escape sequence is being decoded.'''
+        return self._escaping
+
     def _start_esc(self) -> None:
         self.start_ = datetime.datetime.now()
         self._escaping = True
@@ -250,13 +262,13 @@ class Processor:
             elif key == curses.ascii.ESC:
                 self._start_esc()
                 key = POLL
-            return KeyEvent(key)
+            return POLL_EVENT if key == POLL else KeyEvent(key)
 
         assert self._escaping
         if key == curses.ascii.ESC:
             # Trash unrecognized sequence, and start again
             self._start_esc()
-            return KeyEvent(POLL)
+            return POLL_EVENT
         if key < 0:
             # Assume sequence timed out
             seq = self._stop_esc()
@@ -277,7 +289,7 @@ class Processor:
         self._seq += chr(key)
         # debug.out(f'{key} {chr(key)} {str(key)} {delta.total_seconds()}')
         if self._seq not in ESCAPED_TO_COMMAND:
-            return KeyEvent(POLL)
+            return POLL_EVENT
         seq = self._stop_esc()
         cmd = ESCAPED_TO_COMMAND[seq]
         return KeyEvent(key, seq, cmd)
@@ -52,10 +52,12 @@ class StatusView:
         self.pos = (y, x)
 
     def draw(self, status) -> None:
-        '''Draw the status.'''
+        '''Draw the status, padded to the full width of the view so that it
+        covers any previous status.'''
         pos = self.pos
-        self._scr.addstr(pos[0], pos[1], f'{status:^{self._width}}')
-        self._scr.refresh()
+        text = status[:self._width]
+        self._scr.addstr(pos[0], pos[1], f'{text:^{self._width}}')
+        self._scr.noutrefresh()
 
 
 def main_loop(scr,
@@ -77,10 +79,19 @@ def main_loop(scr,
     v = StatusView(scr)
     v.layout()
 
-    scr.timeout(200)
-    status = ''
+    dirty = True
     while True:
         scr.move(v.pos[0], 0)
+        # Views only stage their changes, so that the terminal gets
+        # updated once per event, and only if something got drawn
+        if dirty:
+            scr.noutrefresh()
+            curses.doupdate()
+            dirty = False
+        # Poll quickly while decoding an escape sequence, so that a single
+        # ESC key press is reported without delay
+        scr.timeout(keys.ESCAPE_POLL_DELAY if keys_processor.is_escaping()
+                    else APP.get_poll_delay())
         try:
             ev = keys_processor.get()
         except KeyboardInterrupt:
@@ -92,9 +103,8 @@ def main_loop(scr,
             continue
         if ev.cmd == enums.Command.RESIZE:
             v.layout()
-        app.clear(scr, v.pos[0], v.pos[1], len(status))
-        status = new_status
-        v.draw(status)
+        v.draw(new_status)
+        dirty = True
 
 
 def main_curses(scr, args) -> None:
@@ -110,6 +120,15 @@ def init_env() -> argparse.ArgumentParser:
     '''Initialize environment and return argument parser.'''
     # https://stackoverflow.com/questions/27372068/why-does-the-escape-key-have-a-delay-in-python-curses
     os.environ.setdefault('ESCDELAY', '25')
+    # Let users on slow connections tune how often an auto reloaded file
+    # gets checked when idle
+    try:
+        app.POLL_DELAY_MAX = max(
+            app.POLL_DELAY_MIN,
+            int(os.environ.get('SEARCHF_POLL_DELAY_MAX',
+                               app.POLL_DELAY_MAX)))
+    except ValueError:
+        pass
     os.environ['TERM'] = 'screen-256color'
     parser = argparse.ArgumentParser(
         description='Console application to search into text files and \
@@ -2,15 +2,20 @@
 
 Model classes are used to organize content processing. The main
 classes are:
+- LinesBuffer: holds the lines of a file, shared by all views.
 - RawContent: holds the unfiltered original file content.
 - SelectedContent: holds all the lines that got selected either because
   they match a filter or because of additional context being revealed.
 - DisplayContent: line-wrapped version of SelectedContent.
 '''
 
+import bisect
+import itertools
 import math
+import operator
 
 from typing import Dict
+from typing import Iterable
 from typing import List
 from typing import NamedTuple
 from typing import Optional
@@ -100,6 +105,45 @@ class Filter:
         self.add(keyword)
         return count, keyword
 
+    def clone(self) -> 'Filter':
+        '''Returns a copy of this filter.'''
+        f = Filter()
+        f.ignore_case = self.ignore_case
+        f.hiding = self.hiding
+        f.keywords = self.keywords.copy()
+        return f
+
+
+# Characters that have a special meaning in a regular expression. Keywords
+# that do not contain any of these can be searched as plain text.
+REGEX_SPECIAL_CHARS = frozenset('.^$*+?{}[]\\|()\n')
+
+
+def is_literal(keyword: str) -> bool:
+    '''Returns True if the keyword matches exactly itself when used as a
+    regular expression.'''
+    return REGEX_SPECIAL_CHARS.isdisjoint(keyword)
+
+
+def fold(text: str) -> str:
+    '''Folds the case of the given text, so that a case insensitive match
+    of a literal keyword implies that the folded keyword is found in the
+    folded text.'''
+    # re.IGNORECASE matches dotless i and dotted capital I with i and I,
+    # while casefold() keeps the former apart and turns the latter into
+    # two characters
+    return text.replace('\u0130', 'i').casefold().replace('\u0131', 'i')
+
+
+def intersect(found1: bytes, found2: bytes) -> bytes:
+    '''Returns the lines found in both given results of
+    LinesBuffer.find_lines().'''
+    assert len(found1) == len(found2)
+    # Lines are flagged with 0 or 1, so a bitwise and over the whole
+    # results flags lines found in both
+    both = int.from_bytes(found1, 'little') & int.from_bytes(found2, 'little')
+    return both.to_bytes(len(found1), 'little')
+
 
 def digits_count(number: int) -> int:
     '''Returns the number of digits required to display given number.'''
@@ -232,6 +276,8 @@ class SelectedContent:
         '''
         self._lines = lines
         self._hits = hits
+        self._line_indices: Optional[List[int]] = None
+        self._matching: Optional[List[int]] = None
 
     @property
     def hits(self) -> List[int]:
@@ -256,6 +302,36 @@ class SelectedContent:
         '''Gets the current hits count'''
         return sum(self._hits)
 
+    def find_line(self, line_idx: int) -> int:
+        '''Gets the index of the first selected line whose index in the
+        original content is greater or equal to the given one, or the
+        selected lines count if there is none.'''
+        if self._line_indices is None:
+            # Rulers take the index of the line above them, so that
+            # indices are sorted and can be bisected
+            indices = []
+            last = RULER_INDEX
+            for idx, _, _, _ in self._lines:
+                if idx != RULER_INDEX:
+                    last = idx
+                indices.append(last)
+            self._line_indices = indices
+        return bisect.bisect_left(self._line_indices, line_idx)
+
+    def find_match(self, iline: int, direction: int) -> int:
+        '''Gets the index of the closest selected line matching a filter,
+        starting from the given selected line (included) and going in the
+        given direction, or -1 if there is none.'''
+        if self._matching is None:
+            self._matching = [i for i, line in enumerate(self._lines)
+                              if line.filter_index >= 0]
+        matching = self._matching
+        if direction > 0:
+            i = bisect.bisect_left(matching, iline)
+            return matching[i] if i < len(matching) else -1
+        i = bisect.bisect_right(matching, iline)
+        return matching[i - 1] if i > 0 else -1
+
     def layout(self,
                height: int,
                width: int,
@@ -303,12 +379,18 @@ def apply_filters(
         background: List[segments.Segment],
         filters: List[Filter],
         hits: List[int],
+        *,
+        index: int = -1,
+        candidates: Optional[List[Optional[bytes]]] = None,
 ) -> Tuple[bool, int, List[segments.Segment]]:
     '''Apply filters to the line and return true if the line should be
     displayed, with the index of first filter that has been match (or -1 if
     none) and the list of segments to colorize the line with. This function
     increments the hit count of each matching filter.
 
+    If given, candidates flags for each filter the lines it can possibly
+    match (or is None if unknown), and index is the index of the line.
+
     '''
     first_show_idx = -1
     hide_count = 0
@@ -316,6 +398,10 @@ def apply_filters(
     segs = []
     segs.append(background)
     for fidx, f in enumerate(filters):
+        if candidates:
+            candidate = candidates[fidx]
+            if candidate is not None and not candidate[index]:
+                continue
         matching, matching_segments = \
             segments.find_matching(line, f.keywords, f.ignore_case, fidx)
         if matching:
@@ -336,28 +422,151 @@ def apply_filters(
     return False, -1, background
 
 
+PreparedLine = Tuple[List[segments.Segment], str]
+
+# Number of literal keyword search results kept by each LinesBuffer
+FOUND_CACHE_SIZE = 16
+
+# Number of lines case folded at once when searching while ignoring case
+FOLD_CHUNK_SIZE = 4096
+
+# Literal keywords found in more than this ratio of the lines do not
+# narrow down the search enough to be worth looking for first
+FOUND_MAX_RATIO = 0.5
+
+
+class LinesBuffer:
+    '''Holds the lines of a file so that they can be shared by several
+    views, along with the lines prepared for filtering (tabs expanded and
+    SGR processed) for the last SGR mode requested.
+
+    Attributes:
+        _lines       Lines of the original file.
+        _prepared    SGR mode last requested and the lines prepared for it.
+        _found       Lines found for the last literal keywords searched,
+                     least recently used first.
+    '''
+    def __init__(self, lines: Optional[List[str]] = None) -> None:
+        self._lines: List[str] = lines if lines is not None else []
+        self._prepared: Optional[
+            Tuple[enums.SgrMode, List[PreparedLine]]] = None
+        self._found: Dict[
+            Tuple[str, bool, enums.SgrMode], Optional[bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __getitem__(self, i: int) -> str:
+        return self._lines[i]
+
+    def prepare(self, sgr_mode: enums.SgrMode) -> List[PreparedLine]:
+        '''Gets the background segments and the text of each line, as
+        processed for the given SGR mode. Only lines prepared for the last
+        mode are kept, as they take as much memory as the lines
+        themselves.'''
+        if self._prepared is None or self._prepared[0] != sgr_mode:
+            # Release lines prepared for another mode before preparing
+            self._prepared = None
+            processor = sgr.Processor()
+            prepared = []
+            for i, line in enumerate(self._lines):
+                # Replace tabs with 4 spaces (not clean!!!)
+                line = line.replace('\t', '    ')
+                background, line = processor.filter(line, sgr_mode)
+                assert len(line) <= 0 or ord(line[0]) != 0, \
+                    f'Line {i} has embedded null character'
+                prepared.append((background, line))
+            self._prepared = (sgr_mode, prepared)
+        return self._prepared[1]
+
+    def _fold(self, sgr_mode: enums.SgrMode) -> Iterable[str]:
+        '''Yields the case folded prepared lines. Lines are folded by
+        chunks, which is much faster than one by one, while never holding
+        a folded copy of all the lines.'''
+        prepared = self.prepare(sgr_mode)
+        for start in range(0, len(prepared), FOLD_CHUNK_SIZE):
+            chunk = prepared[start:start + FOLD_CHUNK_SIZE]
+            yield from fold(
+                '\n'.join(map(operator.itemgetter(1), chunk))).split('\n')
+
+    def find_lines(
+            self,
+            keyword: str,
+            ignore_case: bool,
+            sgr_mode: enums.SgrMode,
+    ) -> Optional[bytes]:
+        '''Returns for each prepared line 1 if it contains the given literal
+        keyword, 0 otherwise, or None if most lines contain it. Checking
+        all lines for a plain text is much faster than matching each line
+        with a regular expression. Last results are cached, so that
+        pushing a keyword does not search again for the keywords already
+        pushed.'''
+        assert is_literal(keyword)
+        key = (keyword, ignore_case, sgr_mode)
+        if key in self._found:
+            # Moved last, as most recently used
+            found = self._found.pop(key)
+        else:
+            texts: Iterable[str]
+            if ignore_case:
+                texts = self._fold(sgr_mode)
+                keyword = fold(keyword)
+            else:
+                texts = map(operator.itemgetter(1), self.prepare(sgr_mode))
+            found = bytes(map(operator.contains, texts,
+                              itertools.repeat(keyword)))
+            if found.count(1) > FOUND_MAX_RATIO * len(found):
+                found = None
+            if len(self._found) >= FOUND_CACHE_SIZE:
+                del self._found[next(iter(self._found))]
+        self._found[key] = found
+        return found
+
+
 class RawContent:
     '''Holds raw content of a file and generates instances of
     SelectedContent from filters.
 
     Attributes:
-        _lines       Lines of the original file.
+        _buffer      Lines of the original file.
     '''
     def __init__(self) -> None:
-        self._lines: List[str] = []
-        self._sgr = sgr.Processor()
+        self._buffer: LinesBuffer = LinesBuffer()
 
     def line_count(self) -> int:
         '''Gets the number of lines in the original file'''
-        return len(self._lines)
+        return len(self._buffer)
 
     def line_number_length(self) -> int:
         '''Number of digit required to display bigest line number'''
-        return digits_count(len(self._lines))
+        return digits_count(len(self._buffer))
 
     def set_lines(self, lines: List[str]) -> None:
         '''Sets and stores the file content lines.'''
-        self._lines = lines
+        self._buffer = LinesBuffer(lines)
+
+    def set_buffer(self, buffer: LinesBuffer) -> None:
+        '''Sets the file content lines, possibly shared with others.'''
+        self._buffer = buffer
+
+    def _get_candidates(
+            self,
+            f: Filter,
+            sgr_mode: enums.SgrMode,
+    ) -> Optional[bytes]:
+        '''Flags the lines that the given filter can possibly match, or
+        returns None if the filter has no literal keyword to narrow down
+        the search.'''
+        candidates = None
+        for keyword in f.keywords:
+            if is_literal(keyword):
+                found = self._buffer.find_lines(
+                    keyword, f.ignore_case, sgr_mode)
+                if found is None:
+                    continue
+                candidates = found if candidates is None \
+                    else intersect(candidates, found)
+        return candidates
 
     def filter(self,
                filters: List[Filter],
@@ -373,13 +582,12 @@ class RawContent:
         line_mode = line_mode if sum(not f.hiding for f in filters) > 0 \
             else enums.LineVisibility.ALL
         line_queue = SelectedLineQueue(line_mode)
-        for i, line in enumerate(self._lines):
-            # Replace tabs with 4 spaces (not clean!!!)
-            line = line.replace('\t', '    ')
-            background, line = self._sgr.filter(line, sgr_mode)
-            assert len(line) <= 0 or ord(line[0]) != 0, \
-                f'Line {i} has embedded null character'
-            shown, fidx, segs = apply_filters(line, background, filters, hits)
+        candidates = [self._get_candidates(f, sgr_mode) for f in filters]
+        for i, (background, line) in enumerate(
+                self._buffer.prepare(sgr_mode)):
+            shown, fidx, segs = apply_filters(
+                line, background, filters, hits,
+                index=i, candidates=candidates)
             if shown:
                 if fidx >= 0:
                     lines += line_queue.add_matching(
@@ -418,6 +626,15 @@ class ViewConfig:
     def __init__(self) -> None:
         self.filters: List[Filter] = []
 
+    def clone(self) -> 'ViewConfig':
+        '''Returns a copy of this configuration. All attributes are plain
+        immutable values except filters, which are cloned one by one. This
+        is much cheaper than a generic copy.deepcopy().'''
+        vc = ViewConfig()
+        vc.__dict__.update(self.__dict__)
+        vc.filters = [f.clone() for f in self.filters]
+        return vc
+
     def get_filters_count(self) -> int:
         '''Returns the number of filters currently defined.'''
         return len(self.filters)
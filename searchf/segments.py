@@ -1,11 +1,13 @@
 '''This module contains helper functions to define and manipulate segments.
 '''
 
+import functools
 import re
 
 from typing import List
 from typing import NamedTuple
 from typing import Optional
+from typing import Pattern
 from typing import Iterable
 from typing import Set
 from typing import Tuple
@@ -116,6 +118,13 @@ def sort_and_merge(segments: Set[Segment]) -> List[Segment]:
     return sorted(merged)
 
 
+@functools.lru_cache(maxsize=256)
+def compile_keyword(keyword: str, ignore_case: bool) -> Pattern[str]:
+    '''Returns the compiled regular expression for the given keyword,
+    compiling it only the first time it is requested.'''
+    return re.compile(keyword, re.IGNORECASE if ignore_case else 0)
+
+
 def find_matching(
         text: str,
         keywords,
@@ -127,12 +136,11 @@ def find_matching(
     an empty list otherwise.
     '''
     assert len(keywords) > 0
-    flags = re.IGNORECASE if ignore_case else 0
     matching: Set[Segment] = set()
     # matching is a set() as multiple matches are possible
     for k in keywords:
         is_matching = False
-        for match in re.finditer(k, text, flags):
+        for match in compile_keyword(k, ignore_case).finditer(text):
             if match.start() >= match.end():
                 continue
             is_matching = True
@@ -70,6 +70,10 @@ SGR_BG_COLOR_TO_COLOR_ID: Dict[int, colors.ColorId] = {
     107: 15,
 }
 
+# Any CSI sequence, and the SGR ones we know how to process
+CSI_RE = re.compile(r'\x1b\[[0-?]*[!-/]*[@-~]')
+SGR_RE = re.compile(r'\x1b\[([0-9]+)(;([0-9]+))?m')
+
 FG_BG_TO_COLOR_PAIR_FUNC: \
     Callable[[colors.ColorId, colors.ColorId], colors.Pair] = \
     colors.get_fg_bg_color_pair
@@ -97,7 +101,7 @@ class Processor:
         background: List[segments.Segment] = []
         if mode == enums.SgrMode.NONE:
             return background, line
-        new_line = re.sub(r'\x1b\[[0-?]*[!-/]*[@-~]', '', line)
+        new_line = CSI_RE.sub('', line)
         if mode == enums.SgrMode.REMOVE:
             return background, new_line
 
@@ -138,7 +142,7 @@ class Processor:
         if self._a:
             self._s = 0
 
-        for match in re.finditer(r'\x1b\[([0-9]+)(;([0-9]+))?m', line):
+        for match in SGR_RE.finditer(line):
             s, e = match.start(), match.end()
             assert s < e
             a_1, a_2 = match.group(1), match.group(3)
@@ -13,6 +13,7 @@ from contextlib import contextmanager
 from .. import app
 from .. import colors
 from .. import debug
+from .. import enums
 from .. import keys
 from .. import main
 from .. import storage
@@ -43,25 +44,37 @@ class KeywordsInjector:
         '''Returns the next keyword'''
         return self._keywords.pop(0)
 
-    def get_text(self, *, scr, y, x, text_prompt, handler, text) -> str:
+    def get_text(self, *, scr, y, x, text_prompt, handler, text,
+                 maxw=None) -> str:
         '''Function to replace main.get_next'''
         # pylint: disable=unused-argument
         return self.get_next()
 
 
-class MtimeInjector:
+class Stat(NamedTuple):
+    '''Subset of os.stat_result used by the application'''
+    st_mtime_ns: int
+    st_size: int
+    st_dev: int
+    st_ino: int
+
+
+class StatInjector:
     '''Class that emulates end-user externally changing file. Provides
-    a getmtime() function that can replace the one in the main module,
+    a stat() function that can replace the one in the main module,
     and that makes sure the file always changes.'''
 
-    def __init__(self):
-        self._time = 0.0
+    def __init__(self, changing: bool = True):
+        self._time = 0
+        self._changing = changing
 
-    def getmtime(self, path: str) -> float:
-        '''Returns the file last modification time'''
-        # pylint: disable=unused-argument
-        self._time += 1
-        return self._time
+    def stat(self, path: str):
+        '''Returns the file status, with a new modification time unless
+        told otherwise'''
+        if self._changing:
+            self._time += 1
+        st = os.stat(path)
+        return Stat(self._time, st.st_size, st.st_dev, st.st_ino)
 
 
 class MouseProvider:
@@ -82,7 +95,7 @@ TEST_SIZE = (30, 60)
 @contextmanager
 def main_modifier(stdscr,
                   keywords_injector: KeywordsInjector,
-                  mtime_injector: MtimeInjector):
+                  stat_injector: StatInjector):
     '''Context manager that replaces key and text input methods of the main
     module, and makes sure tests are run always with same screen
     resolution.
@@ -96,16 +109,16 @@ def main_modifier(stdscr,
         return TEST_SIZE
 
     get_text = app.get_text
-    getmtime = app.getmtime
+    stat = app.stat
     get_max_yx = app.get_max_yx
     app.get_text = keywords_injector.get_text
-    app.getmtime = mtime_injector.getmtime
+    app.stat = stat_injector.stat
     app.get_max_yx = _injected_get_max_yx
     try:
         yield
     finally:
         app.get_text = get_text
-        app.getmtime = getmtime
+        app.stat = stat
         app.get_max_yx = get_max_yx
 
 
@@ -133,7 +146,7 @@ def _run(stdscr, t: AppTest, f: str):
     store = storage.Store('.searchf.test')
     with main_modifier(stdscr,
                        KeywordsInjector(t.inputs.copy()),
-                       MtimeInjector()):
+                       StatInjector()):
         margins = types.Margins()
         margins.bottom += 1
         main.APP.create(store=store, scr=stdscr, margins=margins,
@@ -147,24 +160,134 @@ def _run(stdscr, t: AppTest, f: str):
     store.destroy()
 
 
+def _poll_until_handled() -> str:
+    '''Polls the application until it reports a change, as files are
+    loaded in the background, and returns the status.'''
+    for _ in range(100):
+        handled, status = main.APP.handle_event(keys.KeyEvent(keys.POLL))
+        if handled:
+            return status
+        time.sleep(0.01)
+    assert False, 'No change reported'
+    return ''
+
+
+def _test_app_append(stdscr):
+    '''Test auto reloading a file that gets appended to.'''
+    print('Test app auto reloading appended file')
+    path = '.searchf.test.txt'
+    with open(TEST_FILE, encoding='utf-8') as fin:
+        with open(path, 'w', encoding='utf-8') as fout:
+            fout.write(fin.read())
+    stdscr.clear()
+    store = storage.Store('.searchf.test')
+    # Modification time never changes, so changes are only told apart by
+    # size
+    with main_modifier(stdscr, KeywordsInjector([]), StatInjector(False)):
+        main.APP.create(store=store, scr=stdscr, margins=types.Margins(),
+                        show_events=False, path=path)
+        # Nothing to poll for until auto reload is enabled
+        assert main.APP.get_poll_delay() == app.POLL_NEVER
+        main.APP.handle_event(keys.KeyEvent(ord('T')))
+        assert main.APP.get_poll_delay() >= app.POLL_DELAY_MIN
+        expected = app.load_lines(TEST_FILE)
+        # Incomplete last line forces a full reload on next append, and
+        # so does rewriting the file, even if it gets bigger
+        for mode, text, lines in [
+                ('a', 'Appended line\n', expected + ['Appended line']),
+                ('a', 'Incomplete', expected + ['Appended line',
+                                                'Incomplete']),
+                ('a', ' line\n', expected + ['Appended line',
+                                             'Incomplete line']),
+                ('w', 'old 1\nold 2\n', ['old 1', 'old 2']),
+                ('w', 'new 1\nnew 2\nnew 3\n', ['new 1', 'new 2', 'new 3']),
+        ]:
+            with open(path, mode, encoding='utf-8') as f:
+                f.write(text)
+            assert _poll_until_handled() == 'File reloaded'
+            assert main.APP.lines == lines
+        # Failing to load is reported, and not retried until the file
+        # changes again
+        with open(path, 'ab') as f:
+            f.write(b'bad \xff byte\n')
+        assert _poll_until_handled().startswith('Reload failed: ')
+        assert main.APP.lines == lines
+        for _ in range(2):
+            assert main.APP.handle_event(keys.KeyEvent(keys.POLL)) == \
+                (False, app.STATUS_UNCHANGED)
+        assert main.APP.get_poll_delay() > app.POLL_DELAY_MIN
+    os.remove(path)
+    store.destroy()
+
+
+def _test_app_reload(stdscr):
+    '''Test reloading a file whose modification time did not change.'''
+    print('Test app reloading file with preserved modification time')
+    path = '.searchf.test.txt'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('old\n')
+    stdscr.clear()
+    store = storage.Store('.searchf.test')
+    with main_modifier(stdscr, KeywordsInjector([]), StatInjector(False)):
+        main.APP.create(store=store, scr=stdscr, margins=types.Margins(),
+                        show_events=False, path=path)
+        assert main.APP.lines == ['old']
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('new\n')
+        # Same modification time and size, but an explicit reload
+        # must still read the file
+        handled, status = main.APP.handle_event(keys.KeyEvent(ord('r')))
+        assert handled
+        assert status == 'File reloaded'
+        assert main.APP.lines == ['new']
+    os.remove(path)
+    store.destroy()
+
+
+def _test_app_commands(stdscr):
+    '''Test that every command is handled either by the application or
+    by the current view, but never by both.'''
+    print('Test app commands dispatch')
+    stdscr.clear()
+    store = storage.Store('.searchf.test')
+    with main_modifier(stdscr, KeywordsInjector([]), StatInjector()):
+        main.APP.create(store=store, scr=stdscr, margins=types.Margins(),
+                        show_events=False, path=TEST_FILE)
+        view = main.APP.current_view
+        for cmd in enums.Command:
+            assert main.APP.handles(cmd) != view.supports(cmd), cmd
+    store.destroy()
+
+
 def _test_main_init_env():
     print('Test main.init_env()')
     parser = main.init_env()
     assert parser
+    delay = app.POLL_DELAY_MAX
+    os.environ['SEARCHF_POLL_DELAY_MAX'] = '500'
+    main.init_env()
+    assert app.POLL_DELAY_MAX == 500
+    os.environ['SEARCHF_POLL_DELAY_MAX'] = 'invalid'
+    main.init_env()
+    assert app.POLL_DELAY_MAX == 500
+    del os.environ['SEARCHF_POLL_DELAY_MAX']
+    app.POLL_DELAY_MAX = delay
 
 
 def _test_main_get_text(stdscr):
     print('Test main.get_text()')
 
-    def my_handler(_):
-        pass
+    def my_handler(box):
+        # Cursor is expected right after the prefilled text
+        assert box.win.getyx() == (0, len('Editable content'))
 
     def my_handler_throwing(_):
         raise app.EscapeException
 
-    app.get_text(scr=stdscr, x=0, y=0,
-                 text_prompt="Testing prompt", handler=my_handler,
-                 text='Editable content')
+    text = app.get_text(scr=stdscr, x=0, y=0,
+                        text_prompt="Testing prompt", handler=my_handler,
+                        text='Editable content')
+    assert text == 'Editable content'
     app.get_text(scr=stdscr, x=0, y=0,
                  text_prompt="Testing prompt", handler=my_handler_throwing,
                  text='')
@@ -210,19 +333,20 @@ def _test_main_debug_view(stdscr):
     # Test debug mode in a very hacky way by hijacking handle_event function
     # and spitting out a few dummy debug lines per key press
     app.USE_DEBUG = True
-    original_handle_event = main.APP.handle_event
+    # App uses __slots__, so its method is replaced on the class
+    original_handle_event = app.App.handle_event
 
-    def my_handle_event(key):
+    def my_handle_event(self, key):
         for i in range(20):
             debug.out(f'Test {i} dbg {key}')
-        return original_handle_event(key)
+        return original_handle_event(self, key)
 
-    main.APP.handle_event = my_handle_event
+    app.App.handle_event = my_handle_event
     app_test = AppTest(
         'Test special debug mode',
         ['/', 'n', 'n', 'n', 'p', 'p'], ['filter'])
     _run(stdscr, app_test, TEST_FILE)
-    main.APP.handle_event = original_handle_event
+    app.App.handle_event = original_handle_event
     app.USE_DEBUG = False
 
 
@@ -297,6 +421,9 @@ def _run_app_tests(stdscr):
     for test in app_tests:
         _run(stdscr, test, TEST_FILE_C)
 
+    _test_app_append(stdscr)
+    _test_app_reload(stdscr)
+    _test_app_commands(stdscr)
     _test_main_init_env()
     _test_main_get_text(stdscr)
     _test_app_validate()
@@ -335,6 +462,10 @@ def _run_unit_tests():
     test_models.test_offsets()
     print('Test models.test_view_config()')
     test_models.test_view_config()
+    print('Test models.test_lines_buffer()')
+    test_models.test_lines_buffer()
+    print('Test models.test_find_lines()')
+    test_models.test_find_lines()
     print('Test keys.test_processor()')
     test_keys.test_process()
     print('Test keys.test_process()')
@@ -370,6 +501,10 @@ def _test_main_main():
                 raise KeyboardInterrupt
             return keys.KeyEvent(self._keys.pop(0))
 
+        def is_escaping(self) -> bool:
+            '''Returns whether an escape sequence is being decoded'''
+            return False
+
     @contextmanager
     def _main_modifier():
         keys_processor = keys.Processor
@@ -55,14 +55,20 @@ def test_get_color_pair():
     '''Tests colors.get_color_pair()'''
     if not _setup():
         return
-    # WARNING: this is not a real test since function has side-effects
-    # we are not validating
-    colors.get_color_pair(0, -1)
-    colors.get_color_pair(0, 0)
+    colors.init()
+    assert colors.get_color_pair(0, -1) == curses.color_pair(0)
+    first = colors.FIRST_FILTER_COLOR_PAIR_ID
+    assert colors.get_color_pair(0, 0) == curses.color_pair(first)
+    count = len(colors.PALETTES[1])
+    assert colors.get_color_pair(1, count + 1) == \
+        curses.color_pair(first + 1)
 
 
 def test_get_fg_bg_color_pair():
     '''Tests colors.get_fg_bg_color_pair()'''
     if not _setup():
         return
-    colors.get_fg_bg_color_pair(-1, 0)
+    colors.init()
+    pair = colors.get_fg_bg_color_pair(-1, 0)
+    assert colors.get_color_pair_id(-1, 0) in colors.SGR_PAIRS_INITIALIZED
+    assert colors.get_fg_bg_color_pair(-1, 0) == pair
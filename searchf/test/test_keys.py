@@ -34,6 +34,9 @@ def test_process():
     key = proc.process(ord('A'))
     assert key.key == ord('A')
 
+    # Polling without escaping returns the shared poll event
+    assert proc.process(keys.POLL) is keys.POLL_EVENT
+
     for k in '\x1b[1;2C':
         key = proc.process(ord(k))
         assert key.key == -1 or key.cmd == enums.Command.GO_SRIGHT
@@ -52,8 +55,10 @@ def test_process():
     # Make sure we spit out ESC if polling right after escaping
     key = proc.process(27)
     assert key.key == keys.POLL
+    assert proc.is_escaping()
     key = proc.process(-1)
     assert key.key == curses.ascii.ESC
+    assert not proc.is_escaping()
 
     # Make sure we spit out UNMAP if polling in middle of unrecognize seq
     key = proc.process(27)
@@ -13,6 +13,14 @@ def test_filter():
     assert count == 1
     assert keyword == 'Keyword'
 
+    f.ignore_case = True
+    clone = f.clone()
+    assert clone.ignore_case
+    assert not clone.hiding
+    clone.add('Other')
+    assert len(f.keywords) == 1
+    assert len(clone.keywords) == 2
+
     f.pop()
     count, keyword = f.get_count_and_last_keyword()
     assert count == 0
@@ -116,6 +124,15 @@ def test_display_content():
     f = models.Filter()
     f.add('third')
     sc = rc.filter([f], enums.LineVisibility.CONTEXT_1, SGR_MODE)
+    # First selected line is a ruler
+    assert sc.find_line(0) == 1
+    assert sc.find_line(2) == 2
+    assert sc.find_line(3) == sc.visible_line_count()
+    assert sc.find_match(0, 1) == 2
+    assert sc.find_match(2, 1) == 2
+    assert sc.find_match(3, 1) == -1
+    assert sc.find_match(1, -1) == -1
+    assert sc.find_match(3, -1) == 2
     dc = sc.layout(1, 1, True)
     assert dc
 
@@ -161,3 +178,95 @@ def test_view_config():
     assert last != vc.top_filter()
 
     vc.set_palette(1)
+
+    clone = vc.clone()
+    assert clone.palette_id == 1
+    assert clone.get_filters_count() == 2
+    assert clone.top_filter() is not vc.top_filter()
+    clone.top_filter().add('keyword')
+    assert len(vc.top_filter().keywords) == 0
+    clone.wrap = not vc.wrap
+    assert clone.wrap != vc.wrap
+
+
+def test_lines_buffer():
+    '''Test models.LinesBuffer'''
+    buffer = models.LinesBuffer(['a\tb', '\x1b[31mred\x1b[0m'])
+    assert len(buffer) == 2
+    assert buffer[0] == 'a\tb'
+    prepared = buffer.prepare(SGR_MODE)
+    assert prepared == [([], 'a    b'), ([], 'red')]
+    assert buffer.prepare(SGR_MODE) is prepared
+    raw = buffer.prepare(enums.SgrMode.NONE)
+    assert raw[1] == ([], '\x1b[31mred\x1b[0m')
+    assert buffer.prepare(SGR_MODE) is not prepared
+    assert buffer.prepare(SGR_MODE) == prepared
+
+    rc1 = models.RawContent()
+    rc2 = models.RawContent()
+    rc1.set_buffer(buffer)
+    rc2.set_buffer(buffer)
+    f = models.Filter()
+    f.add('red')
+    assert rc1.filter([f], enums.LineVisibility.ALL, SGR_MODE).hits == [1]
+    assert rc2.filter([f], enums.LineVisibility.ALL, SGR_MODE).hits == [1]
+
+
+def test_find_lines():
+    '''Test models.LinesBuffer.find_lines()'''
+    assert models.is_literal('some text')
+    assert not models.is_literal('some.*text')
+    assert models.fold('ı') == models.fold('I')
+    assert models.fold('İ') == models.fold('i')
+
+    buffer = models.LinesBuffer([
+        'An apple',
+        'A banana and an apple',
+        'APPLE',
+        'ap',
+        'ple',
+        'kiwi',
+        'lemon'])
+    assert buffer.find_lines('cherry', False, SGR_MODE) == bytes(7)
+    assert buffer.find_lines('apple', False, SGR_MODE) == \
+        bytes([1, 1, 0, 0, 0, 0, 0])
+    assert buffer.find_lines('apple', True, SGR_MODE) == \
+        bytes([1, 1, 1, 0, 0, 0, 0])
+    assert buffer.find_lines('apple', True, SGR_MODE) is \
+        buffer.find_lines('apple', True, SGR_MODE)
+    assert buffer.find_lines('A', False, SGR_MODE) == \
+        bytes([1, 1, 1, 0, 0, 0, 0])
+    # Not worth looking for keywords found in most lines
+    assert buffer.find_lines('a', True, SGR_MODE) is None
+    assert models.LinesBuffer().find_lines('a', False, SGR_MODE) == b''
+    # Lines are folded by chunks
+    size = models.FOLD_CHUNK_SIZE + 2
+    buffer2 = models.LinesBuffer(['kiwi'] * (size - 1) + ['APPLE'])
+    assert buffer2.find_lines('apple', True, SGR_MODE) == \
+        bytes(size - 1) + bytes([1])
+    assert models.intersect(bytes([1, 1, 0]), bytes([0, 1, 1])) == \
+        bytes([0, 1, 0])
+
+    # Only last results are kept
+    found = buffer.find_lines('kiwi', False, SGR_MODE)
+    for i in range(models.FOUND_CACHE_SIZE):
+        buffer.find_lines(f'{i}', False, SGR_MODE)
+    assert buffer.find_lines('kiwi', False, SGR_MODE) is not found
+
+    rc = models.RawContent()
+    rc.set_buffer(buffer)
+    f = models.Filter()
+    f.add('apple')
+    f.add('an.')
+    f.ignore_case = True
+    sc = rc.filter([f], enums.LineVisibility.ONLY_MATCHING, SGR_MODE)
+    assert sc.hits == [2]
+
+    # Same hits as a regular expression ignoring case
+    rc.set_lines(['ISTANBUL', 'istanbul', 'İstanbul', 'ıstanbul',
+                  'Ankara', 'Izmir', 'Bursa', 'Antalya'])
+    f = models.Filter()
+    f.add('İstanbul')
+    f.ignore_case = True
+    sc = rc.filter([f], enums.LineVisibility.ONLY_MATCHING, SGR_MODE)
+    assert sc.hits == [4]
@@ -8,6 +8,7 @@ from typing import NamedTuple
 @dataclass
 class Margins():
     '''Defining margins for window.'''
+    __slots__ = ('top', 'bottom', 'left', 'right')
     top: int
     bottom: int
     left: int
@@ -7,6 +7,8 @@ import re
 import sys
 
 from typing import Any
+from typing import Callable
+from typing import Dict
 from typing import List
 from typing import NamedTuple
 from typing import Optional
@@ -37,6 +39,11 @@ CASE_COL_LEN = len(max(CASE_COL_TEXTS, key=len))
 SHOWN_COL_TEXTS = ['Shown', 'no', 'yes']
 SHOWN_COL_LEN = len(max(SHOWN_COL_TEXTS, key=len))
 
+# Cells of the filter stack, formatted once as they never change
+CASE_COL_CELLS = [f' | {t:^{CASE_COL_LEN}}' for t in CASE_COL_TEXTS]
+SHOWN_COL_CELLS = [f' | {t:^{SHOWN_COL_LEN}} | ' for t in SHOWN_COL_TEXTS]
+FILTERS_HEADER = f'{CASE_COL_CELLS[0]}{SHOWN_COL_CELLS[0]}Keywords '
+
 
 class PrefixInfo(NamedTuple):
     '''Line prefix infos.
@@ -71,12 +78,95 @@ class TextView:
         self._scr = scr
         self._name: str = name
         self._basename: str = os.path.basename(path)
+        # Texts shown in the status bar that never change
+        self._name_text: str = f' {name} '
+        self._basename_text: str = f' {self._basename} '
         # self._win: Optional[curses._CursesWindow]
         self._win: Any = None
         self._size: types.Size = (0, 0)
         self._content_available_size: types.Size = (0, 0)
         self._ruler: str = ''
 
+        # Map commands to functions, built once rather than on every
+        # command executed
+        dispatch: Dict[enums.Command, Callable[[], types.Status]] = {
+            enums.Command.GO_UP:
+                lambda: self._vscroll(-1),
+            enums.Command.GO_DOWN:
+                lambda: self._vscroll(1),
+            enums.Command.GO_LEFT:
+                lambda: self._hscroll(-1),
+            enums.Command.GO_RIGHT:
+                lambda: self._hscroll(1),
+            enums.Command.GO_HOME:
+                lambda: self.set_v_offset(0, True),
+            enums.Command.GO_END:
+                lambda: self.set_v_offset(sys.maxsize, True),
+            enums.Command.GO_NPAGE:
+                lambda: self._vpagescroll(1),
+            enums.Command.GO_PPAGE:
+                lambda: self._vpagescroll(-1),
+            enums.Command.GO_SLEFT:
+                lambda: self._hscroll(-20),
+            enums.Command.GO_SRIGHT:
+                lambda: self._hscroll(20),
+            enums.Command.VSCROLL_TO_NEXT_MATCH:
+                lambda: self._vscroll_to_match(False, 1),
+            enums.Command.VSCROLL_TO_PREV_MATCH:
+                lambda: self._vscroll_to_match(False, -1),
+            enums.Command.NEXT_COLORIZE_MODE:
+                lambda: self._cycle_colorize_mode(True),
+            enums.Command.PREV_COLORIZE_MODE:
+                lambda: self._cycle_colorize_mode(False),
+            enums.Command.NEXT_PALETTE:
+                lambda: self._cycle_palette(True),
+            enums.Command.PREV_PALETTE:
+                lambda: self._cycle_palette(False),
+            enums.Command.NEXT_LINE_VISIBILITY:
+                lambda: self._cycle_line_visibility(True),
+            enums.Command.PREV_LINE_VISIBILITY:
+                lambda: self._cycle_line_visibility(False),
+            enums.Command.NEXT_SGR_MODE:
+                lambda: self._cycle_sgr_mode(True),
+            enums.Command.PREV_SGR_MODE:
+                lambda: self._cycle_sgr_mode(False),
+            enums.Command.POP_FILTER:
+                self._pop_filter,
+            enums.Command.POP_KEYWORD:
+                self._pop_keyword,
+            enums.Command.TOGGLE_LINE_NUMBERS:
+                self._toggle_line_numbers,
+            enums.Command.TOGGLE_WRAP:
+                self._toggle_wrap,
+            enums.Command.TOGGLE_BULLETS:
+                self._toggle_bullets,
+            enums.Command.TOGGLE_SHOW_SPACES:
+                self._toggle_show_spaces,
+            enums.Command.TOGGLE_IGNORE_CASE:
+                self._toggle_ignore_case,
+            enums.Command.TOGGLE_HIDING:
+                self._toggle_hiding,
+            enums.Command.SWAP_FILTERS:
+                self.swap_filters,
+            enums.Command.ROTATE_FILTERS_UP:
+                lambda: self.rotate_filters(True),
+            enums.Command.ROTATE_FILTERS_DOWN:
+                lambda: self.rotate_filters(False),
+            enums.Command.SLOT_SAVE:
+                self._slot_save,
+            enums.Command.SLOT_DELETE:
+                self._slot_delete,
+            enums.Command.SLOT_LOAD_NEXT:
+                lambda: self._slot_load(True),
+            enums.Command.SLOT_LOAD_PREV:
+                lambda: self._slot_load(False),
+        }
+        # Indexed by command value, like App does
+        self._dispatch: List[Optional[Callable[[], types.Status]]] = \
+            [None] * (max(c.value for c in enums.Command) + 1)
+        for cmd, func in dispatch.items():
+            self._dispatch[cmd.value] = func
+
     def get_config(self) -> models.ViewConfig:
         '''Gets the config.'''
         return self._config
@@ -120,6 +210,9 @@ class TextView:
 
         if not self._win:
             self._win = curses.newwin(h, w, y, x)
+            # Let curses scroll the terminal when content moves by a few
+            # lines, instead of writing all the lines again
+            self._win.idlok(True)
         else:
             self._win.resize(h, w)
             self._layout(False)
@@ -150,16 +243,14 @@ class TextView:
             self._win.addstr(' No filter ', style)
         else:
             self._win.addstr(f'{self._selected.hits_count():>8}', style)
-            self._win.addstr(f' | {"Case":^{CASE_COL_LEN}}', style)
-            self._win.addstr(f' | {"Shown":^{SHOWN_COL_LEN}}', style)
-            self._win.addstr(' | Keywords ', style)
+            self._win.addstr(FILTERS_HEADER, style)
 
         # Print from right to left
         def move_left_for(x, text):
             return max(0, x - len(text) - 1)
 
         x = w
-        text = f' {self._name} '
+        text = self._name_text
         x = move_left_for(x, text)
         self._win.addstr(y, x, text, style)
 
@@ -174,7 +265,7 @@ class TextView:
         x = move_left_for(x, text)
         self._win.addstr(y, x, text, style)
 
-        text = f' {self._basename} '
+        text = self._basename_text
         x = move_left_for(x, text)
         self._win.addstr(y, x, text, style | USE_BOLD)
 
@@ -184,10 +275,8 @@ class TextView:
             x = 0
             y += 1
             self._win.addstr(y, 0, f'{self._selected.hits[i]:>8}')
-            text = CASE_COL_TEXTS[1 if f.ignore_case else 2]
-            self._win.addstr(f' | {text:^{CASE_COL_LEN}}')
-            text = SHOWN_COL_TEXTS[1 if f.hiding else 2]
-            self._win.addstr(f' | {text:^{SHOWN_COL_LEN}} | ')
+            self._win.addstr(CASE_COL_CELLS[1 if f.ignore_case else 2])
+            self._win.addstr(SHOWN_COL_CELLS[1 if f.hiding else 2])
             text = ' AND '.join(f.keywords)
             color = 0 if f.hiding else self._get_color_pair(i)
             self._win.addstr(text, color)
@@ -205,10 +294,10 @@ class TextView:
         if is_first_line and w_index > 0:
             assert line_idx >= 0
             self._win.addstr(y, 0, f'{line_idx:>{w_index}}', color | USE_BOLD)
-        else:
-            fill = ' '
-            self._win.addstr(y, 0, f'{fill:>{w_index}}', color | USE_BOLD)
-        self._win.addstr(y, w_index, f'{sep}')
+        elif w_index > 0:
+            self._win.addstr(y, 0, ' ' * w_index, color | USE_BOLD)
+        if sep:
+            self._win.addstr(y, w_index, sep)
 
     def _draw_content(
             self,
@@ -220,34 +309,55 @@ class TextView:
             ffidx: int,
             ffcolor: int,
     ) -> None:
-        _, width = self._content_available_size
-        vend = offset + width
+        vend = offset + self._content_available_size[1]
         if self._config.show_spaces:
             text = text.replace(' ', '·')  # Note: this is curses.ACS_BULLET
 
+        line_colorized = ffidx != -1 and \
+            self._config.colorize_mode == enums.ColorizeMode.LINE
+        if line_colorized or not segs:
+            # Fast path, when the whole line is drawn with the same
+            # attributes, which is the case of most lines
+            attr = ffcolor if line_colorized else self._get_color_pair(-1)
+            self._draw_text(pos.y, pos.x, text[offset:vend], attr)
+            return
+
         x = pos.x
+        # Consecutive segments ending up with the same attributes are
+        # glued together, so that they are written with a single call
+        run = segments.Segment(offset, offset, 0)
         for match, start, end, attr in segments.iterate(
                 offset, vend, segs):
             assert match or attr == -1
             assert start < end
-            length = end - start
-            if ffidx != -1 and \
-               self._config.colorize_mode == enums.ColorizeMode.LINE:
-                attr = ffcolor
-            elif attr == -1 or (attr & curses.A_ATTRIBUTES) == 0:
+            if attr == -1 or (attr & curses.A_ATTRIBUTES) == 0:
                 # Assume attr is a filter index
                 attr = self._get_color_pair(attr)
             # otherwise use attributes from segment as is
-            self._win.addnstr(pos.y, x, text[start:end], length, attr)
-            # Some characters like emojs and chinese characters actually
-            # take 2 spot on the screen, so we just use current cursor
-            # position after last write
-            _, x = self._win.getyx()
+            if attr == run.attr and start == run.end:
+                run = run._replace(end=end)
+                continue
+            x = self._draw_text(pos.y, x, text[run.start:run.end], run.attr)
+            run = segments.Segment(start, end, attr)
+        self._draw_text(pos.y, x, text[run.start:run.end], run.attr)
+
+    def _draw_text(self, y: int, x: int, text: str, attr: int) -> int:
+        '''Draws the given text and returns the column following it.'''
+        if not text:
+            return x
+        self._win.addnstr(y, x, text, len(text), attr)
+        # Some characters like emojs and chinese characters actually
+        # take 2 spot on the screen, so we just use current cursor
+        # position after last write
+        _, x = self._win.getyx()
+        return x
 
     def draw(self) -> None:
         '''Draws the view.'''
         # debug.out(f'{self._name} draw {self._offsets.voffset}')
-        self._win.clear()
+        # Not clear(), which would force the whole window to be written
+        # to the terminal again, even the cells that did not change
+        self._win.erase()
 
         prefix_info = self._get_prefix_info()
         ymax, _ = self._content_available_size
@@ -294,14 +404,17 @@ class TextView:
                 ffcolor=ffcolor)
 
         self._draw_bar(self._content_available_size[0])
-        self._win.refresh()
+        # Only stage the window, terminal is updated once per event
+        self._win.noutrefresh()
 
     def _layout(self, redraw: bool) -> None:
         '''Propagate layout changes: evaluates the available space and
         recompute displayable content from the selected lines.
         '''
 
-        self._ruler = '-' * self._size[1]
+        # Rulers only depend on the width, which rarely changes
+        if len(self._ruler) != self._size[1]:
+            self._ruler = '-' * self._size[1]
 
         # Compute space available for file content
         h, w = self._size
@@ -335,11 +448,11 @@ class TextView:
         self._config = config
         self._sync(False)
 
-    def set_lines(self, lines: List[str]) -> None:
+    def set_buffer(self, buffer: models.LinesBuffer) -> None:
         '''Sets the content of this view. Assumes the view is offscreen and
         does not trigger a redraw.
         '''
-        self._raw.set_lines(lines)
+        self._raw.set_buffer(buffer)
         self._sync(False)
 
     def _pop_filter(self) -> types.Status:
@@ -355,7 +468,7 @@ class TextView:
         if len(keyword) <= 0:
             return 'No keyword added'
         try:
-            re.compile(keyword)
+            segments.compile_keyword(keyword, False)
         except re.error:
             return 'Invalid python regex pattern'
         if not self._config.has_filters():
@@ -496,13 +609,9 @@ class TextView:
         elif line >= self._display.lines_count():
             self.set_v_offset(sys.maxsize, True)
         else:
-            voffset = 0
-            for iline, _ in self._display.dlines:
-                i, _, _, _ = self._selected.lines[iline]
-                if i >= line:
-                    self.set_v_offset(voffset, True)
-                    break
-                voffset += 1
+            iline = self._selected.find_line(line)
+            if iline < len(self._selected.lines):
+                self.set_v_offset(self._display.firstdlines[iline], True)
         return f'Goto line {line}'
 
     def has_filters(self) -> bool:
@@ -532,16 +641,12 @@ class TextView:
             direction: int,
     ) -> types.Status:
         idline = self._offsets.voffset
-        ilinemax = len(self._selected.lines)
         iline, _ = self._display.dlines[idline]
         if not starting:
             iline += direction
-        while 0 <= iline < ilinemax:
-            _, fidx, _, _ = self._selected.lines[iline]
-            if fidx >= 0:
-                idline = self._display.firstdlines[iline]
-                break
-            iline += direction
+        iline = self._selected.find_match(iline, direction)
+        if iline >= 0:
+            idline = self._display.firstdlines[iline]
         # Remember current offset to be able to return a side-effect
         # description
         prev_offset = self._offsets.voffset
@@ -565,82 +670,17 @@ class TextView:
         self._vscroll(delta * self._content_available_size[0])
         return STATUS_EMPTY
 
+    def supports(self, command: enums.Command) -> bool:
+        '''Tells whether the given command can be executed.'''
+        return self._dispatch[command.value] is not None
+
     def execute(self, command: enums.Command) -> types.Status:
-        '''Executes the given command.'''
-        dispatch = {
-            enums.Command.GO_UP:
-                lambda: self._vscroll(-1),
-            enums.Command.GO_DOWN:
-                lambda: self._vscroll(1),
-            enums.Command.GO_LEFT:
-                lambda: self._hscroll(-1),
-            enums.Command.GO_RIGHT:
-                lambda: self._hscroll(1),
-            enums.Command.GO_HOME:
-                lambda: self.set_v_offset(0, True),
-            enums.Command.GO_END:
-                lambda: self.set_v_offset(sys.maxsize, True),
-            enums.Command.GO_NPAGE:
-                lambda: self._vpagescroll(1),
-            enums.Command.GO_PPAGE:
-                lambda: self._vpagescroll(-1),
-            enums.Command.GO_SLEFT:
-                lambda: self._hscroll(-20),
-            enums.Command.GO_SRIGHT:
-                lambda: self._hscroll(20),
-            enums.Command.VSCROLL_TO_NEXT_MATCH:
-                lambda: self._vscroll_to_match(False, 1),
-            enums.Command.VSCROLL_TO_PREV_MATCH:
-                lambda: self._vscroll_to_match(False, -1),
-            enums.Command.NEXT_COLORIZE_MODE:
-                lambda: self._cycle_colorize_mode(True),
-            enums.Command.PREV_COLORIZE_MODE:
-                lambda: self._cycle_colorize_mode(False),
-            enums.Command.NEXT_PALETTE:
-                lambda: self._cycle_palette(True),
-            enums.Command.PREV_PALETTE:
-                lambda: self._cycle_palette(False),
-            enums.Command.NEXT_LINE_VISIBILITY:
-                lambda: self._cycle_line_visibility(True),
-            enums.Command.PREV_LINE_VISIBILITY:
-                lambda: self._cycle_line_visibility(False),
-            enums.Command.NEXT_SGR_MODE:
-                lambda: self._cycle_sgr_mode(True),
-            enums.Command.PREV_SGR_MODE:
-                lambda: self._cycle_sgr_mode(False),
-            enums.Command.POP_FILTER:
-                self._pop_filter,
-            enums.Command.POP_KEYWORD:
-                self._pop_keyword,
-            enums.Command.TOGGLE_LINE_NUMBERS:
-                self._toggle_line_numbers,
-            enums.Command.TOGGLE_WRAP:
-                self._toggle_wrap,
-            enums.Command.TOGGLE_BULLETS:
-                self._toggle_bullets,
-            enums.Command.TOGGLE_SHOW_SPACES:
-                self._toggle_show_spaces,
-            enums.Command.TOGGLE_IGNORE_CASE:
-                self._toggle_ignore_case,
-            enums.Command.TOGGLE_HIDING:
-                self._toggle_hiding,
-            enums.Command.SWAP_FILTERS:
-                self.swap_filters,
-            enums.Command.ROTATE_FILTERS_UP:
-                lambda: self.rotate_filters(True),
-            enums.Command.ROTATE_FILTERS_DOWN:
-                lambda: self.rotate_filters(False),
-            enums.Command.SLOT_SAVE:
-                self._slot_save,
-            enums.Command.SLOT_DELETE:
-                self._slot_delete,
-            enums.Command.SLOT_LOAD_NEXT:
-                lambda: self._slot_load(True),
-            enums.Command.SLOT_LOAD_PREV:
-                lambda: self._slot_load(False),
-        }
-        assert command in dispatch, f'command {command}'
-        return dispatch[command]()
+        '''Executes the given command, raising KeyError if it is not
+        supported.'''
+        func = self._dispatch[command.value]
+        if func is None:
+            raise KeyError(command)
+        return func()
 
 
 class DebugView:
@@ -670,7 +710,7 @@ class DebugView:
             except curses.error:
                 pass
 
-        self._win.refresh()
+        self._win.noutrefresh()
 
     def out(self, *argv) -> None:
         '''Outputs the given arg to the debug view.'''
@@ -692,18 +732,24 @@ class KeyEventView:
         self._x = 0
         self._y = 0
         self._w = 0
+        self._text = ''
 
     def layout(self, y: int, x: int, _: int, w: int) -> None:
         '''Layout view.'''
         self._x = x
         self._y = y
         self._w = w
+        # Force next show() to draw
+        self._text = ''
 
     def show(self, ev: keys.KeyEvent) -> None:
-        '''Show key pressed'''
-        if not ev.is_poll():
-            text = f'    KEY {ev.text:15} {ev.cmd}'
-            self._scr.addstr(self._y,
-                             self._x,
-                             f'{text:<{self._w}}',
-                             curses.A_BOLD)
+        '''Show key pressed, unless it is already shown.'''
+        assert not ev.is_poll()
+        text = f'    KEY {ev.text:15} {ev.cmd}'
+        if text == self._text:
+            return
+        self._text = text
+        self._scr.addstr(self._y,
+                         self._x,
+                         f'{text:<{self._w}}',
+                         curses.A_BOLD)